@@ -1,151 +1,77 @@
 import streamlit as st
-import os
-import json
-from openai import OpenAI
-from pypdf import PdfReader
-from dotenv import load_dotenv
-import requests
-
-
-load_dotenv()
+from core import HISTORY_WINDOW, SUMMARY_TRIGGER, Me, SemanticCache
 
 
 st.set_page_config(page_title="Ashish Kamat | AI Chat", layout="centered")
 
-# Load Pushover tokens from secrets if available
-# PUSHOVER_TOKEN = st.secrets.get("PUSHOVER_TOKEN", os.getenv("PUSHOVER_TOKEN"))
-# PUSHOVER_USER = st.secrets.get("PUSHOVER_USER", os.getenv("PUSHOVER_USER"))
-PUSHOVER_TOKEN = os.getenv("PUSHOVER_TOKEN")
-PUSHOVER_USER =  os.getenv("PUSHOVER_USER")
-
-def push(text):
-    if PUSHOVER_TOKEN and PUSHOVER_USER:
-        requests.post(
-            "https://api.pushover.net/1/messages.json",
-            data={
-                "token": PUSHOVER_TOKEN,
-                "user": PUSHOVER_USER,
-                "message": text,
-            }
-        )
-
-
-def record_user_details(email, name="Name not provided", notes="not provided"):
-    push(f"Recording {name} with email {email} and notes {notes}")
-    return {"recorded": "ok"}
-
-
-def record_unknown_question(question):
-    push(f"Recording {question}")
-    return {"recorded": "ok"}
-
-
-record_user_details_json = {
-    "name": "record_user_details",
-    "description": "Use this tool to record user interest and email address",
-    "parameters": {
-        "type": "object",
-        "properties": {
-            "email": {"type": "string", "description": "User email"},
-            "name": {"type": "string", "description": "User name"},
-            "notes": {"type": "string", "description": "Additional notes"}
-        },
-        "required": ["email"]
-    }
-}
-
-record_unknown_question_json = {
-    "name": "record_unknown_question",
-    "description": "Record any unanswered question",
-    "parameters": {
-        "type": "object",
-        "properties": {
-            "question": {"type": "string", "description": "Unanswered question"}
-        },
-        "required": ["question"]
-    }
-}
-
-tools = [
-    {"type": "function", "function": record_user_details_json},
-    {"type": "function", "function": record_unknown_question_json}
-]
 
-
-class Me:
-    def __init__(self):
-        self.openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or st.secrets["OPENAI_API_KEY"])
-        self.name = "Ashish Kamat"
-        self.linkedin = self._read_pdf("me/linkedin.pdf")
-        self.cv = self._read_pdf("me/cv.pdf")
-        self.summary = self._read_file("me/summary.txt")
-
-    def _read_pdf(self, path):
-        try:
-            reader = PdfReader(path)
-            return "\n".join(p.extract_text() or "" for p in reader.pages)
-        except Exception:
-            return "Not available."
-
-    def _read_file(self, path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception:
-            return "Summary not available."
-
-    def handle_tool_call(self, tool_calls):
-        results = []
-        for tool_call in tool_calls:
-            tool_name = tool_call.function.name
-            args = json.loads(tool_call.function.arguments)
-            tool = globals().get(tool_name)
-            result = tool(**args) if tool else {}
-            results.append({"role": "tool", "content": json.dumps(result), "tool_call_id": tool_call.id})
-        return results
-
-    def system_prompt(self):
-        return (
-            f"You are {self.name}, representing him professionally. "
-            f"Use his summary, CV, and LinkedIn below to respond to users:\n\n"
-            f"## Summary:\n{self.summary}\n\n"
-            f"## LinkedIn:\n{self.linkedin}\n\n"
-            f"## CV:\n{self.cv}\n\n"
-            "If unsure of something, record the question with the tool. "
-            "Encourage users to share their email and record it too."
-        )
-
-    def chat(self, user_message, chat_history):
-        messages = [{"role": "system", "content": self.system_prompt()}] + chat_history + [{"role": "user", "content": user_message}]
-        while True:
-            response = self.openai.chat.completions.create(
-                model="gpt-4o-mini", messages=messages, tools=tools
-            )
-            msg = response.choices[0].message
-            if response.choices[0].finish_reason == "tool_calls":
-                tool_results = self.handle_tool_call(msg.tool_calls)
-                messages.append(msg)
-                messages.extend(tool_results)
-            else:
-                return msg.content
+@st.cache_resource
+def get_me():
+    return Me()
 
 
 # --- Streamlit UI ---
 st.title("🤖 Chat with Ashish Kamat")
-me = Me()
+
+if st.session_state.get("last_error"):
+    st.error(st.session_state.pop("last_error"))
+
+me = get_me()
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "response_cache" not in st.session_state:
+    st.session_state.response_cache = SemanticCache()
+if "conversation_summary" not in st.session_state:
+    st.session_state.conversation_summary = ""
+    st.session_state.summarized_upto = 0
 
 for msg in st.session_state.chat_history:
     st.chat_message(msg["role"]).write(msg["content"])
 
-user_input = st.chat_input("Ask Ashish about his experience, skills, or resume...")
-
-if user_input:
-    st.chat_message("user").write(user_input)
-    st.session_state.chat_history.append({"role": "user", "content": user_input})
-
-    reply = me.chat(user_input, st.session_state.chat_history)
-    st.chat_message("assistant").write(reply)
-    st.session_state.chat_history.append({"role": "assistant", "content": reply})
+if "in_flight" not in st.session_state:
+    st.session_state.in_flight = False
+    st.session_state.pending_input = None
+
+user_input = st.chat_input(
+    "Ask Ashish about his experience, skills, or resume...",
+    disabled=st.session_state.in_flight,
+)
+
+# Single flight: take the submission, then rerun so the input renders disabled while
+# the reply is generated; submissions while a reply is pending are ignored
+if user_input and not st.session_state.in_flight:
+    st.session_state.pending_input = user_input
+    st.session_state.in_flight = True
+    st.rerun()
+
+if st.session_state.in_flight:
+    pending = st.session_state.pending_input
+    st.chat_message("user").write(pending)
+    try:
+        # Send every unsummarised turn verbatim; once there are too many, fold all but the
+        # latest HISTORY_WINDOW into the rolling summary so nothing is ever dropped unseen
+        history = st.session_state.chat_history
+        start = st.session_state.summarized_upto
+        if len(history) - start > SUMMARY_TRIGGER:
+            cut = len(history) - HISTORY_WINDOW
+            st.session_state.conversation_summary = me.summarize(history[start:cut], st.session_state.conversation_summary)
+            st.session_state.summarized_upto = start = cut
+        recent = history[start:]
+
+        reply = st.chat_message("assistant").write_stream(
+            me.chat(pending, recent, st.session_state.response_cache, st.session_state.conversation_summary)
+        )
+    except Exception as e:
+        # This run already drew the input disabled, so rerun to re-enable it and report
+        # the error there; Streamlit's own rerun/stop signals are not Exceptions
+        st.session_state.in_flight = False
+        st.session_state.pending_input = None
+        st.session_state.last_error = f"Sorry, something went wrong: {e}"
+        st.rerun()
+    # Record the turn only once the reply is complete so history keeps alternating
+    history.append({"role": "user", "content": pending})
+    history.append({"role": "assistant", "content": reply})
+    st.session_state.in_flight = False
+    st.session_state.pending_input = None
+    st.rerun()
@@ -0,0 +1,439 @@
+import streamlit as st
+import os
+import functools
+import orjson
+import pickle
+import queue
+import threading
+import time
+import numpy as np
+from openai import OpenAI
+import fitz
+from pypdf import PdfReader
+from dotenv import load_dotenv
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Parse .env once per process instead of on every rerun
+@functools.lru_cache(maxsize=None)
+def get_env():
+    load_dotenv()
+    return {
+        name: os.getenv(name)
+        for name in ("OPENAI_API_KEY", "PUSHOVER_TOKEN", "PUSHOVER_USER")
+    }
+
+
+# Load Pushover tokens from secrets if available
+# PUSHOVER_TOKEN = st.secrets.get("PUSHOVER_TOKEN", os.getenv("PUSHOVER_TOKEN"))
+# PUSHOVER_USER = st.secrets.get("PUSHOVER_USER", os.getenv("PUSHOVER_USER"))
+PUSHOVER_TOKEN = get_env()["PUSHOVER_TOKEN"]
+PUSHOVER_USER = get_env()["PUSHOVER_USER"]
+
+PUSHOVER_URL = "https://api.pushover.net/1/messages.json"
+
+
+# Shared clients live in cache_resource so they also survive Streamlit's module reloads
+@st.cache_resource
+def get_push_session():
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return session
+
+
+def _drain_push_queue(push_queue, session):
+    while True:
+        text = push_queue.get()
+        try:
+            session.post(
+                PUSHOVER_URL,
+                data={
+                    "token": PUSHOVER_TOKEN,
+                    "user": PUSHOVER_USER,
+                    "message": text,
+                },
+                timeout=3,
+            )
+        except requests.RequestException:
+            pass  # a failed notification must never break the chat
+
+
+@st.cache_resource
+def get_push_queue():
+    push_queue = queue.Queue()
+    threading.Thread(target=_drain_push_queue, args=(push_queue, get_push_session()), daemon=True).start()
+    return push_queue
+
+
+def push(text):
+    if PUSHOVER_TOKEN and PUSHOVER_USER:
+        get_push_queue().put_nowait(text)
+
+
+def record_user_details(email, name="Name not provided", notes="not provided"):
+    push(f"Recording {name} with email {email} and notes {notes}")
+    return {"recorded": "ok"}
+
+
+def record_unknown_question(question):
+    push(f"Recording {question}")
+    return {"recorded": "ok"}
+
+
+record_user_details_json = {
+    "name": "record_user_details",
+    "description": "Use this tool to record user interest and email address",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "email": {"type": "string", "description": "User email"},
+            "name": {"type": "string", "description": "User name"},
+            "notes": {"type": "string", "description": "Additional notes"}
+        },
+        "required": ["email"]
+    }
+}
+
+record_unknown_question_json = {
+    "name": "record_unknown_question",
+    "description": "Record any unanswered question",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "question": {"type": "string", "description": "Unanswered question"}
+        },
+        "required": ["question"]
+    }
+}
+
+tools = [
+    {"type": "function", "function": record_user_details_json},
+    {"type": "function", "function": record_unknown_question_json}
+]
+
+TOOL_REGISTRY = {
+    "record_user_details": record_user_details,
+    "record_unknown_question": record_unknown_question,
+}
+
+# Fixed per-request arguments, built once and unpacked into every completion call
+_TOOLS_FROZEN = tuple(tools)
+_REQ_TEMPLATE = {"model": "gpt-4o-mini", "tools": _TOOLS_FROZEN}
+
+
+class SemanticCache:
+    """Bounded store of recent Q&A pairs, matched by embedding cosine similarity.
+
+    Each entry also keeps an embedding of the reply that preceded the question
+    (zeros if there was none); a hit needs both the question and that context
+    to match, so follow-ups are not answered from an unrelated conversation.
+    """
+
+    def __init__(self, maxlen=64, threshold=0.93, context_threshold=0.9):
+        self.maxlen = maxlen
+        self.threshold = threshold
+        self.context_threshold = context_threshold
+        self.entries = []
+        # float32 rows, grown by doubling; the first len(entries) are in use
+        self.matrix = None
+        self.context = None
+        self._oldest = 0  # slot overwritten next once the cache is full
+
+    def lookup(self, vec, context_vec=None):
+        n = len(self.entries)
+        if not n:
+            return None
+        sims = self.matrix[:n] @ vec
+        stored_has_context = self.context[:n].any(axis=1)
+        if context_vec is None:
+            ok = ~stored_has_context
+        else:
+            ok = stored_has_context & (self.context[:n] @ context_vec > self.context_threshold)
+        ok &= sims > self.threshold
+        if not ok.any():
+            return None
+        return self.entries[int(np.argmax(np.where(ok, sims, -np.inf)))][1]
+
+    def add(self, vec, question, answer, context_vec=None):
+        if context_vec is None:
+            context_vec = np.zeros_like(vec)
+        n = len(self.entries)
+        if n == self.maxlen:
+            self.matrix[self._oldest] = vec
+            self.context[self._oldest] = context_vec
+            self.entries[self._oldest] = (question, answer)
+            self._oldest = (self._oldest + 1) % self.maxlen
+            return
+        if self.matrix is None or n == len(self.matrix):
+            rows = min(max(2 * n, 8), self.maxlen)
+            grown = np.empty((rows, vec.size), dtype=np.float32)
+            grown_context = np.empty((rows, vec.size), dtype=np.float32)
+            if n:
+                grown[:n] = self.matrix
+                grown_context[:n] = self.context
+            self.matrix, self.context = grown, grown_context
+        self.matrix[n] = vec
+        self.context[n] = context_vec
+        self.entries.append((question, answer))
+
+
+@st.cache_data(show_spinner=False)
+def read_pdf(path, mtime):
+    # mtime is only part of the cache key so edited PDFs are picked up on reload
+    try:
+        with fitz.open(path) as doc:
+            return "\n".join(page.get_text("text") for page in doc)
+    except Exception:
+        reader = PdfReader(path)
+        return "\n".join(p.extract_text() or "" for p in reader.pages)
+
+
+CORPUS_CACHE = "me/.cache.pkl"
+PDF_UNAVAILABLE = "Not available."
+SUMMARY_UNAVAILABLE = "Summary not available."
+EMBEDDING_MODEL = "text-embedding-3-small"
+CHUNK_WORDS = 225  # roughly 300 tokens
+TOP_K_CHUNKS = 5
+MIN_CACHE_WORDS = 4  # shorter messages ("yes", "tell me more") depend on context, so skip the cache
+EMBED_RETRY_SECONDS = 300  # minimum gap between attempts to embed the chunks after a failure
+CACHE_CONTEXT_CHARS = 500  # tail of the previous reply embedded alongside the question
+HISTORY_WINDOW = 16  # messages kept verbatim after older turns are summarised
+SUMMARY_TRIGGER = 32  # most unsummarised messages sent before folding into the summary
+
+
+def chunk_text(text, label, max_words=CHUNK_WORDS):
+    words = text.split()
+    return [f"[{label}] " + " ".join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
+
+
+class Me:
+    def __init__(self):
+        self.openai = OpenAI(api_key=get_env()["OPENAI_API_KEY"] or st.secrets["OPENAI_API_KEY"])
+        self.name = "Ashish Kamat"
+        corpus = self._load_corpus()
+        self.linkedin = corpus["linkedin"]
+        self.cv = corpus["cv"]
+        self.summary = corpus["summary"]
+        # Only the summary is always sent; CV and LinkedIn are retrieved per question
+        self._system_prompt = (
+            f"You are {self.name}, representing him professionally. "
+            f"Use his summary and the CV and LinkedIn excerpts below to respond to users:\n\n"
+            f"## Summary:\n{self.summary}\n\n"
+            "If unsure of something, record the question with the tool. "
+            "Encourage users to share their email and record it too."
+        )
+        self.chunks = chunk_text(self.linkedin, "LinkedIn") + chunk_text(self.cv, "CV")
+        self._corpus = corpus
+        self._embed_lock = threading.Lock()
+        self._next_embed_attempt = 0.0
+        # Stored vectors are only valid for the exact chunks and model they were made from
+        if corpus.get("chunks") == self.chunks and corpus.get("embedding_model") == EMBEDDING_MODEL:
+            self.chunk_matrix = corpus.get("chunk_matrix")
+        else:
+            self.chunk_matrix = None
+            corpus.pop("chunk_matrix", None)
+        if self.chunk_matrix is None:
+            # Embeddings are persisted with the text, so this only runs when the sources change
+            self._embed_chunks()
+            self._save_corpus(corpus)
+
+    def _embed_chunks(self):
+        """Try to embed the chunks; on failure system_prompt sends the full CV and LinkedIn text."""
+        if not self.chunks:
+            return False
+        self._next_embed_attempt = time.monotonic() + EMBED_RETRY_SECONDS
+        try:
+            self.chunk_matrix = self.get_embeddings(self.chunks)
+        except Exception:
+            return False
+        self._corpus.update(chunks=self.chunks, embedding_model=EMBEDDING_MODEL, chunk_matrix=self.chunk_matrix)
+        return True
+
+    def _retry_embed_chunks(self):
+        # Me is shared across sessions, so only one of them retries at a time
+        if self.chunk_matrix is not None or time.monotonic() < self._next_embed_attempt:
+            return
+        if not self._embed_lock.acquire(blocking=False):
+            return
+        try:
+            if self.chunk_matrix is None and self._embed_chunks():
+                self._save_corpus(self._corpus)
+        finally:
+            self._embed_lock.release()
+
+    def _load_corpus(self):
+        # Reuse text (and chunk embeddings) from an earlier process while the sources are unchanged
+        paths = ("me/linkedin.pdf", "me/cv.pdf", "me/summary.txt")
+        fingerprint = tuple(self._stat(path) for path in paths)
+        try:
+            with open(CORPUS_CACHE, "rb") as f:
+                cached = pickle.load(f)
+            if cached["fingerprint"] == fingerprint:
+                return cached
+        except Exception:
+            pass
+        return {
+            "fingerprint": fingerprint,
+            "linkedin": self._read_pdf("me/linkedin.pdf"),
+            "cv": self._read_pdf("me/cv.pdf"),
+            "summary": self._read_file("me/summary.txt"),
+        }
+
+    def _save_corpus(self, corpus):
+        # A failed parse should be retried next start, not persisted
+        if corpus["linkedin"] == PDF_UNAVAILABLE or corpus["cv"] == PDF_UNAVAILABLE or corpus["summary"] == SUMMARY_UNAVAILABLE:
+            return
+        # Write to a temp file and swap it in so concurrent workers never see a partial pickle
+        tmp_path = f"{CORPUS_CACHE}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(corpus, f)
+            os.replace(tmp_path, CORPUS_CACHE)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _stat(self, path):
+        try:
+            info = os.stat(path)
+            return (path, info.st_mtime_ns, info.st_size)
+        except OSError:
+            return (path, None, None)
+
+    def _read_pdf(self, path):
+        try:
+            return read_pdf(path, os.path.getmtime(path))
+        except Exception:
+            return PDF_UNAVAILABLE
+
+    def _read_file(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except Exception:
+            return SUMMARY_UNAVAILABLE
+
+    def _run_tool(self, tool_call):
+        tool_name = tool_call["function"]["name"]
+        args = orjson.loads(tool_call["function"]["arguments"])
+        tool = TOOL_REGISTRY.get(tool_name)
+        result = tool(**args) if tool else {}
+        return {"role": "tool", "content": orjson.dumps(result).decode(), "tool_call_id": tool_call["id"]}
+
+    def handle_tool_call(self, tool_calls):
+        # Tools only enqueue notifications, so running them in turn is cheapest
+        return [self._run_tool(tc) for tc in tool_calls]
+
+    def get_embeddings(self, texts):
+        """Return unit-normalised float32 embeddings, one row per text."""
+        response = self.openai.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+        matrix = np.asarray([d.embedding for d in response.data], dtype=np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    def get_embedding(self, text):
+        return self.get_embeddings([text])[0]
+
+    def retrieve(self, query_vec, k=TOP_K_CHUNKS):
+        if self.chunk_matrix is None:
+            return []
+        sims = self.chunk_matrix @ query_vec
+        if len(sims) > k:
+            top = np.argpartition(sims, -k)[-k:]
+        else:
+            top = np.arange(len(sims))
+        return [self.chunks[i] for i in top[np.argsort(sims[top])[::-1]]]
+
+    def system_prompt(self, query_vec=None):
+        if self.chunk_matrix is None or query_vec is None:
+            return f"{self._system_prompt}\n\n## LinkedIn:\n{self.linkedin}\n\n## CV:\n{self.cv}"
+        excerpts = "\n\n".join(self.retrieve(query_vec))
+        return f"{self._system_prompt}\n\n## CV and LinkedIn excerpts:\n{excerpts}"
+
+    def summarize(self, turns, previous_summary=""):
+        """Fold older chat turns into a short running summary of the conversation."""
+        transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+        response = self.openai.chat.completions.create(
+            model=_REQ_TEMPLATE["model"],
+            messages=[
+                {"role": "system", "content": "Summarize this conversation between a user and a career assistant in a few sentences. Keep names, emails and open questions."},
+                {"role": "user", "content": f"Earlier summary:\n{previous_summary or 'None'}\n\nNew turns:\n{transcript}"},
+            ],
+        )
+        return response.choices[0].message.content
+
+    def chat(self, user_message, chat_history, cache=None, conversation_summary=""):
+        """Yield the assistant reply token by token, resolving tool calls in between.
+
+        chat_history should already be windowed; conversation_summary covers any
+        turns dropped from it. If a SemanticCache is given, a close enough earlier
+        question is answered from it without calling the model.
+        """
+        # Questions are matched on their own embedding; the tail of the previous reply
+        # is embedded separately so follow-ups only hit entries from a similar context
+        self._retry_embed_chunks()
+        use_cache = cache is not None and len(user_message.split()) >= MIN_CACHE_WORDS
+        previous = chat_history[-1]["content"] if chat_history and chat_history[-1]["role"] == "assistant" else ""
+        query_vec = context_vec = None
+        # Embeddings only serve retrieval and the cache; if they fail, answer from the full text
+        if use_cache or self.chunk_matrix is not None:
+            try:
+                if use_cache and previous:
+                    query_vec, context_vec = self.get_embeddings([user_message, previous[-CACHE_CONTEXT_CHARS:]])
+                else:
+                    query_vec = self.get_embedding(user_message)
+            except Exception:
+                query_vec = context_vec = None
+                use_cache = False
+        if use_cache:
+            cached = cache.lookup(query_vec, context_vec)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        used_tools = False
+        system_message = {"role": "system", "content": self.system_prompt(query_vec)}
+        messages = [system_message]
+        if conversation_summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{conversation_summary}"})
+        messages += [*chat_history, {"role": "user", "content": user_message}]
+        while True:
+            stream = self.openai.chat.completions.create(**_REQ_TEMPLATE, messages=messages, stream=True)
+            tool_calls = {}
+            finish_reason = None
+            round_parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta
+                if delta.content:
+                    # Keep text from a round before a tool call apart from the next round's
+                    if not round_parts and parts:
+                        parts.append("\n\n")
+                        yield "\n\n"
+                    round_parts.append(delta.content)
+                    parts.append(delta.content)
+                    yield delta.content
+                # Tool call names/arguments arrive in fragments keyed by index
+                for tc in delta.tool_calls or []:
+                    call = tool_calls.setdefault(tc.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function and tc.function.name:
+                        call["function"]["name"] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        call["function"]["arguments"] += tc.function.arguments
+                finish_reason = choice.finish_reason or finish_reason
+            if finish_reason != "tool_calls":
+                # Turns that triggered tools (e.g. recording an email) must not be replayed
+                answer = "".join(parts)
+                if use_cache and not used_tools and answer:
+                    cache.add(query_vec, user_message, answer, context_vec)
+                return
+            used_tools = True
+            calls = [tool_calls[i] for i in sorted(tool_calls)]
+            messages.append({"role": "assistant", "content": "".join(round_parts) or None, "tool_calls": calls})
+            messages.extend(self.handle_tool_call(calls))